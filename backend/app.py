@@ -6,19 +6,22 @@ and product management using Nuclia and Supabase.
 """
 
 import os
-import json
+import hashlib
 import logging
-import requests
-import re
-from datetime import datetime
-from typing import Dict, List, Optional, Any
-from flask import Flask, request, jsonify
+import httpx
+import orjson
+from typing import Optional, Any
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from flask_compress import Compress
 from flask_cors import CORS
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 
 # IMPORTANT: Make sure your indexing.py file is in the same directory
-from indexing import NucliaIndexer, extract_bn_product_details_from_content, extract_product_details_from_content
+from indexing import NucliaIndexer
+from routes import core_bp, products_bp
+from supabase_writer import SupabaseWriter
 
 # --- Load environment variables ---
 load_dotenv()
@@ -27,145 +30,100 @@ load_dotenv()
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# --- Initialize Flask app and CORS ---
-app = Flask(__name__)
-CORS(app, origins=['http://localhost:3000', 'http://127.0.0.1:3000'], supports_credentials=True)
-
-# --- Initialize Nuclia and Supabase Configuration ---
+# --- Nuclia and Supabase Configuration ---
 EDIT_API_KEY = os.getenv("NUCLIA_WRITER_API_KEY")
 SEARCH_API_KEY = os.getenv("NUCLIA_READER_API_KEY")
 ECOMMERCE_KB_ID = os.getenv("NUCLIA_KB_UID")
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
 
-# --- Validate Configuration ---
-if not all([EDIT_API_KEY, SEARCH_API_KEY, ECOMMERCE_KB_ID]):
-    logger.critical("CRITICAL: Missing required Nuclia environment variables.")
-    raise ValueError("Please set NUCLIA_WRITER_API_KEY, NUCLIA_READER_API_KEY, and NUCLIA_KB_UID in your .env file")
-
-# --- Initialize Supabase client ---
-supabase: Optional[Client] = None
-if SUPABASE_URL and SUPABASE_ANON_KEY:
-    try:
-        supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-        logger.info("Supabase client initialized successfully")
-    except Exception as e:
-        logger.error(f"Failed to initialize Supabase client: {e}")
-else:
-    logger.warning("Supabase URL or Anon Key not set. Supabase integration will be disabled.")
-
-# --- Initialize Nuclia indexer (one instance for the whole app) ---
-indexer = NucliaIndexer(EDIT_API_KEY, SEARCH_API_KEY, ECOMMERCE_KB_ID)
-
-
-# ======================================================================
-# API ENDPOINTS
-# ======================================================================
-
-@app.route('/', methods=['GET'])
-def health_check():
-    """Health check endpoint."""
-    return jsonify({
-        "status": "healthy",
-        "service": "Nuclia RAG E-commerce Backend",
-        "timestamp": datetime.now().isoformat()
-    })
-
-@app.route('/index-url', methods=['POST'])
-def index_url():
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that serializes with orjson instead of the stdlib json module."""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+
+def create_app() -> Flask:
     """
-    Indexes a URL using Nuclia, retrieves the extracted metadata,
-    and stores the product data in Supabase.
+    Build the Flask app: validate configuration, initialize the Nuclia and Supabase
+    clients once, attach them to `app.extensions` and register the API blueprints.
     """
-    data = request.get_json()
-    url = data.get('url')
-    is_product_page = data.get('is_product_page', False)
-    if not url:
-        return jsonify({"success": False, "error": "URL is required"}), 400
-
-    try:
-        # Step 1: Let Nuclia ingest the URL
-        result = indexer.upload_from_url(url=url, title=f"Product from {url}")
-        
-        if not result.get("success"):
-            return jsonify(result), 500
-
-        document_id = result.get("document_id")
-        if not document_id:
-            return jsonify({"success": False, "error": "Failed to get document_id from Nuclia"}), 500
-            
-        # Step 2: Retrieve the resource from Nuclia to get extracted metadata
-        resource_result = indexer.get_resource_by_id(document_id)
-        
-        if resource_result.get("success"):
-            resource_data = resource_result.get("resource", {})
-            usermetadata = resource_data.get("usermetadata", {})
-            
-            # Flatten the Nuclia usermetadata structure
-            extracted_details = indexer._flatten_nuclia_usermetadata(usermetadata)
-            logger.info(f"Retrieved metadata from Nuclia for document {document_id}")
-            logger.debug(f"Extracted details: {extracted_details}")
-        else:
-            extracted_details = {}
-            logger.warning(f"Failed to retrieve resource {document_id} from Nuclia: {resource_result.get('error')}")
-
-        # Step 3: Store the product data in Supabase
-        if supabase:
-            # Set default values if not extracted
-            extracted_details.setdefault("name", "Unknown Product")
-            extracted_details.setdefault("price", "Price not available")
-            extracted_details.setdefault("imageUrl", "")
-            extracted_details.setdefault("description", "")
-            extracted_details.setdefault("supplier", "Unknown Supplier")
-            extracted_details.setdefault("availability", "Unknown")
-            
-            product_data = {
-                "nuclia_document_id": document_id,
-                "name": extracted_details.get("name", "Unknown Product"),
-                "price_text": extracted_details.get("price", "Price not available"),
-                "image_url": extracted_details.get("imageUrl", ""),
-                "description": extracted_details.get("description", ""),
-                "supplier": extracted_details.get("supplier", "Unknown Supplier"),
-                "availability": extracted_details.get("availability", "Unknown"),
-                "product_url": url,
-                "last_updated": datetime.now().isoformat(),
-                "product_type": "product" if is_product_page else "generic",
-                "has_metadata": bool(
-                    extracted_details.get("name") and extracted_details.get("name") != "Unknown Product" or
-                    extracted_details.get("price") and extracted_details.get("price") != "Price not available" or
-                    extracted_details.get("imageUrl") and extracted_details.get("imageUrl") != ""
-                )
-            }
-
-            supabase_result = supabase.table("products").upsert(product_data, on_conflict="nuclia_document_id").execute()
-            logger.info(f"Upserted product data to Supabase for doc {document_id}")
-            result["supabase_success"] = True
-        else:
-            result["supabase_success"] = False
-        
-        return jsonify(result)
-            
-    except Exception as e:
-        logger.error(f"Error in index_url endpoint: {e}", exc_info=True)
-        return jsonify({"success": False, "error": f"Internal server error: {e}"}), 500
-
-@app.route('/list-products', methods=['GET'])
-def list_products():
-    """Lists all indexed resources from Nuclia."""
-    limit = request.args.get('limit', 100, type=int)
-    result = indexer.list_resources(limit=limit)
-    return jsonify(result)
-
-@app.route('/nuclia-config', methods=['GET'])
-def get_nuclia_config():
-    """Provide Nuclia configuration for the chat widget."""
-    return jsonify({
+    # --- Validate Configuration ---
+    if not all([EDIT_API_KEY, SEARCH_API_KEY, ECOMMERCE_KB_ID]):
+        logger.critical("CRITICAL: Missing required Nuclia environment variables.")
+        raise ValueError("Please set NUCLIA_WRITER_API_KEY, NUCLIA_READER_API_KEY, and NUCLIA_KB_UID in your .env file")
+
+    # --- Initialize Flask app and CORS ---
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+    CORS(app, origins=['http://localhost:3000', 'http://127.0.0.1:3000'], supports_credentials=True)
+
+    # --- Compress JSON responses (product listings are large and repetitive) ---
+    app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+    app.config["COMPRESS_BR_LEVEL"] = 4
+    app.config["COMPRESS_MIN_SIZE"] = 500
+    Compress(app)
+
+    # --- Initialize Supabase client ---
+    supabase: Optional[Client] = None
+    supabase_writer: Optional[SupabaseWriter] = None
+    if SUPABASE_URL and SUPABASE_ANON_KEY:
+        try:
+            # One long-lived HTTP/2 client shared by every PostgREST call, sized for the
+            # Waitress threads plus the background writer and lookup pool
+            http_client = httpx.Client(
+                http2=True,
+                timeout=10,
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+            )
+            supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY, options=ClientOptions(httpx_client=http_client))
+            supabase_writer = SupabaseWriter(supabase)
+            logger.info("Supabase client initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize Supabase client: {e}")
+    else:
+        logger.warning("Supabase URL or Anon Key not set. Supabase integration will be disabled.")
+
+    app.extensions["supabase"] = supabase
+    app.extensions["supabase_writer"] = supabase_writer
+
+    # --- Initialize Nuclia indexer (one instance for the whole app) ---
+    app.extensions["indexer"] = NucliaIndexer(EDIT_API_KEY, SEARCH_API_KEY, ECOMMERCE_KB_ID)
+
+    # The chat widget configuration never changes after startup, serialize it (and its ETag) once
+    nuclia_config_json = orjson.dumps({
         "success": True,
         "authtoken": SEARCH_API_KEY,
         "knowledgebox": ECOMMERCE_KB_ID,
         "zone": "aws-eu-central-1-1"
-    })
+    }, option=orjson.OPT_SORT_KEYS)
+    app.extensions["nuclia_config_json"] = nuclia_config_json
+    app.extensions["nuclia_config_etag"] = hashlib.sha1(nuclia_config_json).hexdigest()
+
+    # --- Register API endpoints ---
+    app.register_blueprint(core_bp)
+    app.register_blueprint(products_bp)
+
+    return app
+
+
+app = create_app()
 
 if __name__ == '__main__':
     logger.info("Starting Nuclia RAG Search Engine...")
-    app.run(host='127.0.0.1', port=5000, debug=True)
\ No newline at end of file
+    if os.getenv("FLASK_DEBUG") == "1":
+        # Werkzeug dev server with auto-reload, for local debugging only
+        app.run(host='127.0.0.1', port=5000, debug=True)
+    else:
+        from waitress import serve
+        serve(app, host='127.0.0.1', port=5000, threads=int(os.getenv("BACKEND_THREADS", "16")))
@@ -1,12 +1,31 @@
 import os
+import asyncio
 import json
 import logging
+import httpx
+import orjson
 import requests
 import re
 import html
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union, Any
+from urllib.parse import urljoin
 from dotenv import load_dotenv
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:  # the regex fallbacks still work without lxml, just slower
+    etree = lxml_html = None
+
+try:
+    import hyperscan
+except ImportError:  # optional prefilter for the generic extractor's regex fallbacks
+    hyperscan = None
 
 # Load env vars
 load_dotenv()
@@ -14,6 +33,213 @@ load_dotenv()
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# (connect, read) timeouts for Nuclia calls; /ask generates an answer so it gets a longer read timeout
+REQUEST_TIMEOUT = (5, 30)
+ASK_TIMEOUT = (5, 120)
+
+
+def _json_body(resp: requests.Response) -> Any:
+    """
+    Decode a response body with orjson. Decode errors are re-raised as requests' JSONDecodeError,
+    so callers catching requests.RequestException keep working.
+    """
+    try:
+        return orjson.loads(resp.content)
+    except orjson.JSONDecodeError as e:
+        raise requests.JSONDecodeError(e.msg, e.doc, e.pos, response=resp)
+
+
+# Last (epoch second, timestamp) pair; reassigned whole, so concurrent readers always see a matching pair
+_timestamp_cache = (0, "")
+
+
+def _utc_now_iso() -> str:
+    """
+    Current UTC time in ISO 8601 at second precision, formatted at most once per second.
+    Shared by upload origins and the health check in routes/core.py.
+    """
+    global _timestamp_cache
+    now = int(time.time())
+    if now != _timestamp_cache[0]:
+        _timestamp_cache = (now, datetime.fromtimestamp(now, timezone.utc).isoformat(timespec='seconds'))
+    return _timestamp_cache[1]
+
+
+# Precompiled price patterns shared by the extractors
+_PRICE_TEXT_RE = re.compile(r'\$\d+\.\d+')
+_CURRENCY_SYMBOLS = "$£€¥₹"
+_CURRENCY_PRICE_RE = re.compile(r'[\$£€¥₹]\s*([0-9,]+\.?[0-9]*)', re.IGNORECASE)
+_PRICE_PATTERNS = [
+    re.compile(r'"price"\s*:\s*"([0-9,]+\.?[0-9]*)"', re.IGNORECASE),
+    _CURRENCY_PRICE_RE,
+    re.compile(r'<span[^>]*class="[^"]*price[^"]*"[^>]*>[\$£€¥₹]?\s*([0-9,]+\.?[0-9]*)', re.IGNORECASE),
+]
+
+# Cheap case-insensitive test for JSON-LD anywhere in the page, before any parse
+_LDJSON_HINT_RE = re.compile(r'application/ld\+json', re.IGNORECASE)
+# Used to locate JSON-LD blocks only when lxml is not installed; scans the UTF-8 bytes of the page
+_LDJSON_RE = re.compile(rb'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>', re.IGNORECASE | re.DOTALL)
+
+# Regex fallbacks of the generic extractor, tried in order per field
+_NAME_PATTERNS = [
+    re.compile(p, re.IGNORECASE | re.DOTALL) for p in (
+        r'<title[^>]*>([^<|]+?)(?:\s*[\|\-].*?)?</title>',
+        r'"name"\s*:\s*"([^"]+)"',
+        r'<meta[^>]+property="og:title"[^>]+content="([^"]+)"',
+        r'<h1[^>]*>([^<]+)</h1>',
+    )
+]
+_IMG_PATTERNS = [
+    re.compile(p, re.IGNORECASE) for p in (
+        r'"image"\s*:\s*"([^"]+\.(?:jpg|jpeg|png|webp))"',
+        r'<meta[^>]+property="og:image"[^>]+content="([^"]+)"',
+        r'<img[^>]+(?:data-lazy-)?src=["\']([^"\']+\.(?:jpg|jpeg|png|webp))["\']',
+        r'data-src=["\']([^"\']+\.(?:jpg|jpeg|png|webp))["\']',
+    )
+]
+_SUPPLIER_PATTERNS = [
+    re.compile(p, re.IGNORECASE) for p in (
+        r'"brand"\s*:\s*\{\s*"name"\s*:\s*"([^"]+)"',
+        r'<meta[^>]+name="brand"[^>]+content="([^"]+)"',
+        r'brand["\s]*:?["\s]*([^"\n,]+)',
+    )
+]
+# One alternation for availability, the matching group names the normalized label
+_AVAIL_RE = re.compile(
+    r'(?P<in>in\s+stock)|(?P<out>out\s+of\s+stock)|(?P<avail>available)|(?P<pre>pre-?order)|(?P<back>back\s*order)',
+    re.IGNORECASE
+)
+_AVAIL_LABELS = {"in": "In Stock", "out": "Out of Stock", "avail": "Available", "pre": "Pre-order", "back": "Backorder"}
+
+# B&N author fallbacks when the DOM lookup finds nothing
+_BN_AUTHOR_PATTERNS = [
+    re.compile(p, re.IGNORECASE) for p in (
+        r'<input[^>]*id=["\']author["\'][^>]*value=["\']([^"\']+)["\']',
+        r'by\s*<a[^>]*href=[^>]*>([^<]+)</a>',
+    )
+]
+
+# Class matchers for the BeautifulSoup fallback, one per needle so each find() keeps its priority
+_RE_TITLE = re.compile(r'title', re.I)
+_RE_PRODUCT_TITLE = re.compile(r'product-title', re.I)
+_RE_PRICE = re.compile(r'price', re.I)
+_RE_OVERVIEW = re.compile(r'overview', re.I)
+_RE_DESCRIPTION = re.compile(r'description', re.I)
+_RE_SUMMARY = re.compile(r'summary', re.I)
+_RE_PRODUCT = re.compile(r'product', re.I)
+_RE_IMAGE = re.compile(r'image', re.I)
+_RE_AVAILABILITY = re.compile(r'availability', re.I)
+_RE_STOCK = re.compile(r'stock', re.I)
+
+
+# Precompiled XPaths for the B&N extractor, each candidate list in priority order. Class tests
+# match case-insensitively on a substring of the class attribute, like the _RE_* class matchers.
+if etree is not None:
+    def _class_contains(tag: str, needle: str) -> str:
+        return (f'(.//{tag}[contains(translate(@class, "ABCDEFGHIJKLMNOPQRSTUVWXYZ", '
+                f'"abcdefghijklmnopqrstuvwxyz"), "{needle}")])[1]')
+
+    def _xpaths(*expressions: str) -> List["etree.XPath"]:
+        return [etree.XPath(expression) for expression in expressions]
+
+    _BN_CONTAINER_XP = etree.XPath('(//div[@id="productDetail-container"])[1]')
+    _BN_AUTHOR_SECTION_XP = etree.XPath('(.//div[@id="pdp-header-authors"])[1]')
+    _BN_AUTHOR_INPUT_XP = etree.XPath('(.//input[@id="author"])[1]/@value')
+    _BN_AUTHOR_LINK_XP = etree.XPath('(.//a)[1]')
+    # Every string BeautifulSoup's find(string=...) walks, comments included, in document order
+    _BN_TEXT_XP = etree.XPath('.//text() | .//comment()')
+    _BN_STRINGS_XP = etree.XPath('.//text()')
+    _BN_HAS_HIDDEN_XP = etree.XPath('boolean(ancestor-or-self::script or ancestor-or-self::style or ancestor-or-self::template'
+                                    ' or .//script or .//style or .//template)')
+    _BN_HIDDEN_TEXT_XP = etree.XPath('boolean(ancestor-or-self::script or ancestor-or-self::style or ancestor-or-self::template)')
+    _BN_TITLE_XPS = _xpaths(
+        _class_contains("h1", "title"),
+        '(.//h1)[1]',
+        '(.//*[@data-testid="product-title"])[1]',
+        _class_contains("div", "product-title"),
+    )
+    _BN_PRICE_XPS = _xpaths(
+        '(.//*[@data-testid="price"])[1]',
+        _class_contains("span", "price"),
+        _class_contains("div", "price"),
+    )
+    _BN_DESCRIPTION_XPS = _xpaths(
+        _class_contains("div", "overview"),
+        _class_contains("div", "description"),
+        _class_contains("div", "summary"),
+        '(.//*[@data-testid="description"])[1]',
+    )
+    _BN_IMAGE_XPS = _xpaths(
+        '(.//img[@id="pdpMainImage"])[1]',  # Priority for B&N main product image
+        _class_contains("img", "product"),
+        '(.//img[@data-testid="product-image"])[1]',
+        f'({_class_contains("div", "image")}//img)[1]',
+        '(.//img)[1]',  # Any img as fallback
+    )
+    _BN_AVAILABILITY_XPS = _xpaths(
+        '(.//*[@data-testid="availability"])[1]',
+        _class_contains("span", "availability"),
+        _class_contains("div", "stock"),
+    )
+
+
+def _build_hyperscan_db(patterns: List["re.Pattern"]) -> Optional[Any]:
+    """
+    Compile `patterns` into one Hyperscan database that reports which of them occur in a page,
+    or return None when Hyperscan is unavailable or rejects a pattern.
+    """
+    if hyperscan is None:
+        return None
+    flags = []
+    for p in patterns:
+        hs_flags = hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+        if p.flags & re.IGNORECASE:
+            hs_flags |= hyperscan.HS_FLAG_CASELESS
+        if p.flags & re.DOTALL:
+            hs_flags |= hyperscan.HS_FLAG_DOTALL
+        flags.append(hs_flags)
+    try:
+        db = hyperscan.Database()
+        db.compile(expressions=[p.pattern.encode() for p in patterns], ids=list(range(len(patterns))),
+                   elements=len(patterns), flags=flags)
+        return db
+    except hyperscan.error as e:
+        logger.warning(f"Hyperscan could not compile the extractor patterns, using plain regex: {e}")
+        return None
+
+
+# Every fallback pattern of the generic extractor, prefiltered together in one Hyperscan pass
+_PREFILTER_PATTERNS = _NAME_PATTERNS + _PRICE_PATTERNS + _IMG_PATTERNS + _SUPPLIER_PATTERNS + [_AVAIL_RE]
+_HS_DB = _build_hyperscan_db(_PREFILTER_PATTERNS)
+# Hyperscan scratch space can't be shared by concurrent scans, so each thread gets its own
+_hs_local = threading.local()
+# Characters Hyperscan matches more narrowly than re: under CASELESS|UCP it doesn't fold the dotted
+# and dotless i (nor, in some builds, the long s and Kelvin sign) to ASCII letters, and \s doesn't
+# cover the \x1c-\x1f separators that re's \s accepts. Pages containing them skip the prefilter.
+_HS_UNSAFE_RE = re.compile('[\u0130\u0131\u017f\u212a\x1c-\x1f]')
+
+
+def _matching_patterns(content: str) -> Optional[set]:
+    """
+    Return the fallback patterns that match somewhere in `content`, found in a single scan,
+    or None when there is no prefilter and every pattern has to be tried.
+    """
+    if _HS_DB is None or _HS_UNSAFE_RE.search(content):
+        return None
+    try:
+        data = content.encode()
+    except UnicodeEncodeError:  # lone surrogates; let the re module handle this page
+        return None
+    scratch = getattr(_hs_local, "scratch", None)
+    if scratch is None:
+        scratch = _hs_local.scratch = hyperscan.Scratch(_HS_DB)
+
+    hits = set()
+    _HS_DB.scan(data, match_event_handler=lambda pattern_id, start, end, flags, ctx: hits.add(pattern_id),
+                scratch=scratch)
+    return {_PREFILTER_PATTERNS[pattern_id] for pattern_id in hits}
+
+
 class NucliaIndexer:
     """
     Handles document indexing with Nuclia's API.
@@ -25,18 +251,78 @@ class NucliaIndexer:
         self.knowledge_base_id = knowledge_base_id
         self.base_url = "https://aws-eu-central-1-1.rag.progress.cloud/api"
         self.kb_base_url = f"{self.base_url}/v1/kb/{knowledge_base_id}"
-
-    def _get_edit_headers(self) -> Dict[str, str]:
-        return {
-            "X-NUCLIA-SERVICEACCOUNT": f"Bearer {self.edit_api_key}",
+        # Answers are cached per instance, so entries are already scoped to this KB
+        self._answer_cache = TTLCache(maxsize=256, ttl=3600)
+        self._answer_cache_lock = threading.Lock()
+        # Read-only GETs keyed by URL+params: single resources change rarely, listings more often
+        self._resource_cache = TTLCache(maxsize=1024, ttl=60)
+        self._list_cache = TTLCache(maxsize=64, ttl=10)
+        self._read_cache_lock = threading.Lock()
+        # Auth headers never change, build them once and share them with every session
+        self._edit_headers = {
+            "X-NUCLIA-SERVICEACCOUNT": f"Bearer {edit_api_key}",
             "Content-Type": "application/json"
         }
-
-    def _get_search_headers(self) -> Dict[str, str]:
-        return {
-            "X-NUCLIA-SERVICEACCOUNT": f"Bearer {self.search_api_key}",
+        self._search_headers = {
+            "X-NUCLIA-SERVICEACCOUNT": f"Bearer {search_api_key}",
             "Content-Type": "application/json"
         }
+        # Pooled sessions keep connections to Nuclia alive and carry the auth headers for every call
+        self._edit_session = self._create_session(self._edit_headers)
+        self._search_session = self._create_session(self._search_headers)
+
+    def __enter__(self) -> "NucliaIndexer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the pooled HTTP connections."""
+        self._edit_session.close()
+        self._search_session.close()
+
+    @staticmethod
+    def _create_session(headers: Dict[str, str]) -> requests.Session:
+        """
+        Build a session that sends `headers` on every request and retries idempotent
+        calls on transient gateway errors.
+        """
+        session = requests.Session()
+        session.headers.update(headers)
+        retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504], raise_on_status=False)
+        session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry))
+        return session
+
+    def _cached_get(self, cache: TTLCache, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        GET `url` on the search session and return the decoded JSON, served from `cache` when fresh.
+        Only successful responses are stored; errors propagate as requests exceptions.
+        The cached object itself is returned, so callers hand out shallow copies like ask_nuclia_nl.
+        """
+        key = (url, frozenset(params.items()) if params else frozenset())
+        with self._read_cache_lock:
+            cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+        resp = self._search_session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+        resp.raise_for_status()
+        data = _json_body(resp)
+        with self._read_cache_lock:
+            cache[key] = data
+        return data
+
+    def invalidate(self, document_id: Optional[str] = None) -> None:
+        """
+        Drop cached reads made stale by a write: the given resource (if any) and every listing.
+        """
+        with self._read_cache_lock:
+            if document_id:
+                resource_url = f"{self.kb_base_url}/resource/{document_id}"
+                for key in [key for key in self._resource_cache if key[0] == resource_url]:
+                    self._resource_cache.pop(key, None)
+            self._list_cache.clear()
 
     def _format_metadata_for_nuclia(self, metadata: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """
@@ -62,22 +348,18 @@ class NucliaIndexer:
         error_details = str(e)
         if e.response is not None:
             try:
-                error_details += f" | Response: {e.response.json()}"
+                error_details += f" | Response: {_json_body(e.response)}"
             except json.JSONDecodeError:
                 error_details += f" | Response: {e.response.text}"
         logger.error(f"{method_name} failed: {error_details}")
         return {"success": False, "error": error_details}
 
-    def upload_document(self,
-                        content: str,
-                        title: str,
-                        source_url: Optional[str] = None,
-                        document_type: str = "text",
-                        metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """
-        Upload a text/html document, Nuclia auto-extracts NER, vectors, graph, etc.
-        """
-        url = f"{self.kb_base_url}/resources"
+    def _build_document_payload(self,
+                                content: str,
+                                title: str,
+                                source_url: Optional[str] = None,
+                                document_type: str = "text",
+                                metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         payload = {
             "title": title,
             "texts": {
@@ -91,22 +373,64 @@ class NucliaIndexer:
             payload["origin"] = {
                 "source_id": source_url,
                 "url": source_url,
-                "created": datetime.now().isoformat()
+                "created": _utc_now_iso()
+            }
+        self._add_usermetadata(payload, metadata)
+        return payload
+
+    def _build_text_payload(self, title: str, text: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        payload = {
+            "title": title,
+            "texts": {
+                "text": {"body": text, "format": "PLAIN"}
             }
+        }
+        self._add_usermetadata(payload, metadata)
+        return payload
+
+    def _build_link_payload(self,
+                            url: str,
+                            title: Optional[str] = None,
+                            metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if not title:
+            title = f"Content from {url}"
+        payload = {
+            "title": title,
+            "links": {"link": {"uri": url}}
+        }
+        self._add_usermetadata(payload, metadata)
+        return payload
+
+    def _add_usermetadata(self, payload: Dict[str, Any], metadata: Optional[Dict[str, Any]]) -> None:
         if metadata:
             formatted_metadata = self._format_metadata_for_nuclia(metadata)
             if formatted_metadata:
                 payload["usermetadata"] = formatted_metadata
 
+    def _post_resource(self, payload: Dict[str, Any], method_name: str, log_label: str) -> Dict[str, Any]:
+        url = f"{self.kb_base_url}/resources"
         try:
-            resp = requests.post(url, headers=self._get_edit_headers(), json=payload)
+            resp = self._edit_session.post(url, data=orjson.dumps(payload), timeout=REQUEST_TIMEOUT)
             resp.raise_for_status()
-            result = resp.json()
+            result = _json_body(resp)
             uid = result.get("uuid", "")
-            logger.info(f"Uploaded document {uid}")
+            self.invalidate(uid)
+            logger.info(f"{log_label} {uid}")
             return {"success": True, "document_id": uid, "response": result}
         except requests.RequestException as e:
-            return self._handle_request_exception(e, "upload_document")
+            return self._handle_request_exception(e, method_name)
+
+    def upload_document(self,
+                        content: str,
+                        title: str,
+                        source_url: Optional[str] = None,
+                        document_type: str = "text",
+                        metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Upload a text/html document, Nuclia auto-extracts NER, vectors, graph, etc.
+        """
+        payload = self._build_document_payload(content, title, source_url, document_type, metadata)
+        return self._post_resource(payload, "upload_document", "Uploaded document")
 
     def upload_text(self,
                     title: str,
@@ -115,27 +439,8 @@ class NucliaIndexer:
         """
         Upload plain text for manual product entry.
         """
-        url = f"{self.kb_base_url}/resources"
-        payload = {
-            "title": title,
-            "texts": {
-                "text": {"body": text, "format": "PLAIN"}
-            }
-        }
-        if metadata:
-            formatted_metadata = self._format_metadata_for_nuclia(metadata)
-            if formatted_metadata:
-                payload["usermetadata"] = formatted_metadata
-
-        try:
-            resp = requests.post(url, headers=self._get_edit_headers(), json=payload)
-            resp.raise_for_status()
-            result = resp.json()
-            uid = result.get("uuid", "")
-            logger.info(f"Uploaded manual text {uid}")
-            return {"success": True, "document_id": uid, "response": result}
-        except requests.RequestException as e:
-            return self._handle_request_exception(e, "upload_text")
+        payload = self._build_text_payload(title, text, metadata)
+        return self._post_resource(payload, "upload_text", "Uploaded manual text")
 
     def upload_from_url(self,
                         url: str,
@@ -144,27 +449,8 @@ class NucliaIndexer:
         """
         Fetch & index a remote URL.
         """
-        if not title:
-            title = f"Content from {url}"
-        api_url = f"{self.kb_base_url}/resources"
-        payload = {
-            "title": title,
-            "links": {"link": {"uri": url}}
-        }
-        if metadata:
-            formatted_metadata = self._format_metadata_for_nuclia(metadata)
-            if formatted_metadata:
-                payload["usermetadata"] = formatted_metadata
-
-        try:
-            resp = requests.post(api_url, headers=self._get_edit_headers(), json=payload)
-            resp.raise_for_status()
-            result = resp.json()
-            uid = result.get("uuid", "")
-            logger.info(f"Indexed URL {uid}")
-            return {"success": True, "document_id": uid, "response": result}
-        except requests.RequestException as e:
-            return self._handle_request_exception(e, "upload_from_url")
+        payload = self._build_link_payload(url, title, metadata)
+        return self._post_resource(payload, "upload_from_url", "Indexed URL")
 
     def patch_resource(self, document_id: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -178,13 +464,80 @@ class NucliaIndexer:
             
         payload = {"usermetadata": formatted_metadata}
         try:
-            resp = requests.patch(url, headers=self._get_edit_headers(), json=payload)
+            resp = self._edit_session.patch(url, data=orjson.dumps(payload), timeout=REQUEST_TIMEOUT)
             resp.raise_for_status()
+            self.invalidate(document_id)
             logger.info(f"Patched {document_id}")
-            return {"success": True, "document_id": document_id, "response": resp.json()}
+            return {"success": True, "document_id": document_id, "response": _json_body(resp)}
         except requests.RequestException as e:
             return self._handle_request_exception(e, "patch_resource")
 
+    def _build_bulk_payload(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build the payload for one bulk item: {"url": ...}, {"content": ..., "title": ...}
+        or {"text": ..., "title": ...}, each with optional "metadata".
+        """
+        if "url" in item:
+            return self._build_link_payload(item["url"], item.get("title"), item.get("metadata"))
+        if "content" in item:
+            return self._build_document_payload(item["content"], item["title"], item.get("source_url"),
+                                                item.get("document_type", "text"), item.get("metadata"))
+        if "text" in item:
+            return self._build_text_payload(item["title"], item["text"], item.get("metadata"))
+        raise ValueError("Bulk upload items need a 'url', 'content' or 'text' key")
+
+    def _async_client(self, headers: Dict[str, str]) -> httpx.AsyncClient:
+        """
+        Build an HTTP/2 client for the async paths, so concurrent requests multiplex over a few connections.
+        Created per call, since an async client is bound to the event loop it was opened on.
+        """
+        return httpx.AsyncClient(
+            http2=True,
+            base_url=self.kb_base_url,
+            headers=headers,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+            timeout=httpx.Timeout(REQUEST_TIMEOUT[1], connect=REQUEST_TIMEOUT[0])
+        )
+
+    async def _aupload(self, client: httpx.AsyncClient, item: Dict[str, Any]) -> Dict[str, Any]:
+        payload = self._build_bulk_payload(item)
+        try:
+            resp = await client.post("/resources", content=orjson.dumps(payload))
+        except httpx.HTTPError as e:
+            logger.error(f"bulk_upload failed: {e!r}")
+            return {"success": False, "error": repr(e)}
+        if resp.is_error:
+            error_details = f"{resp.status_code} {resp.reason_phrase} | Response: {resp.text}"
+            logger.error(f"bulk_upload failed: {error_details}")
+            return {"success": False, "error": error_details}
+        result = orjson.loads(resp.content)
+        uid = result.get("uuid", "")
+        self.invalidate(uid)
+        logger.info(f"Bulk uploaded {uid}")
+        return {"success": True, "document_id": uid, "response": result}
+
+    async def bulk_upload(self, items: List[Dict[str, Any]], concurrency: int = 16) -> List[Dict[str, Any]]:
+        """
+        Upload many documents, texts or URLs concurrently, with at most `concurrency` requests in flight.
+        Returns one result per item, in order, shaped like the single upload methods.
+        """
+        sem = asyncio.Semaphore(concurrency)
+        async with self._async_client(self._edit_headers) as client:
+            async def upload(item: Dict[str, Any]) -> Dict[str, Any]:
+                async with sem:
+                    return await self._aupload(client, item)
+
+            results = await asyncio.gather(*(upload(item) for item in items), return_exceptions=True)
+
+        return [
+            {"success": False, "error": str(result)} if isinstance(result, Exception) else result
+            for result in results
+        ]
+
+    def bulk_upload_sync(self, items: List[Dict[str, Any]], concurrency: int = 16) -> List[Dict[str, Any]]:
+        """Blocking wrapper around bulk_upload for callers without an event loop."""
+        return asyncio.run(self.bulk_upload(items, concurrency))
+
     def ask_with_json_schema(self, query: str) -> Dict[str, Any]:
         """
         DEPRECATED: This method is no longer used. Use ask_nuclia_nl and search_nuclia_resources instead.
@@ -192,32 +545,43 @@ class NucliaIndexer:
         logger.warning("ask_with_json_schema is deprecated. Use ask_nuclia_nl and search_nuclia_resources instead.")
         return {"success": False, "error": "Method deprecated"}
 
-    def ask_nuclia_nl(self, query: str) -> Dict[str, Any]:
+    def ask_nuclia_nl(self, query: str, no_cache: bool = False) -> Dict[str, Any]:
         """
         Ask Nuclia for a natural language answer.
+        Successful answers are cached for an hour; pass no_cache=True to force a fresh call.
         """
+        cache_key = " ".join(query.lower().split())
+        if not no_cache:
+            with self._answer_cache_lock:
+                cached = self._answer_cache.get(cache_key)
+            if cached is not None:
+                logger.debug("Serving cached answer for query")
+                return dict(cached)
+
         url = f"{self.kb_base_url}/ask"
         payload = {"query": query}
         
         try:
-            resp = requests.post(url, headers=self._get_search_headers(), json=payload)
+            resp = self._search_session.post(url, data=orjson.dumps(payload), timeout=ASK_TIMEOUT)
             resp.raise_for_status()
-            result = resp.json()
+            result = _json_body(resp)
             
-            return {
+            answer = {
                 "success": True,
                 "answer": result.get("answer", ""),
                 "citations": result.get("citations", [])
             }
+            with self._answer_cache_lock:
+                self._answer_cache[cache_key] = answer
+            return dict(answer)
         except requests.RequestException as e:
             return self._handle_request_exception(e, "ask_nuclia_nl")
 
+    def get_document_entities(self, document_id: str) -> Dict[str, Any]:
         url = f"{self.kb_base_url}/resource/{document_id}"
         try:
-            resp = requests.get(url, headers=self._get_search_headers())
-            resp.raise_for_status()
-            data = resp.json().get("data", {})
-            return {"success": True, "entities": data.get("entities", {}), "relations": data.get("relations", [])}
+            data = self._cached_get(self._resource_cache, url).get("data", {})
+            return {"success": True, "entities": dict(data.get("entities", {})), "relations": list(data.get("relations", []))}
         except requests.RequestException as e:
             return self._handle_request_exception(e, "get_document_entities")
 
@@ -227,9 +591,9 @@ class NucliaIndexer:
         if context:
             payload["context"] = context
         try:
-            resp = requests.post(url, headers=self._get_search_headers(), json=payload)
+            resp = self._search_session.post(url, data=orjson.dumps(payload), timeout=REQUEST_TIMEOUT)
             resp.raise_for_status()
-            result = resp.json()
+            result = _json_body(resp)
             return {"success": True, "rephrased_query": result.get("rephrased_query", query)}
         except requests.RequestException as e:
             response = self._handle_request_exception(e, "rephrase_query")
@@ -239,9 +603,7 @@ class NucliaIndexer:
     def get_resource_by_id(self, document_id: str) -> Dict[str, Any]:
         url = f"{self.kb_base_url}/resource/{document_id}"
         try:
-            resp = requests.get(url, headers=self._get_search_headers())
-            resp.raise_for_status()
-            return {"success": True, "resource": resp.json()}
+            return {"success": True, "resource": dict(self._cached_get(self._resource_cache, url))}
         except requests.RequestException as e:
             return self._handle_request_exception(e, "get_resource_by_id")
 
@@ -271,32 +633,181 @@ class NucliaIndexer:
         url = f"{self.kb_base_url}/resources"
         params = {"page": 0, "size": limit}
         try:
-            resp = requests.get(url, headers=self._get_search_headers(), params=params)
-            resp.raise_for_status()
-            resources = resp.json().get("resources", [])
-            return {"success": True, "resources": resources}
+            resources = self._cached_get(self._list_cache, url, params).get("resources", [])
+            return {"success": True, "resources": list(resources)}
         except requests.RequestException as e:
             return self._handle_request_exception(e, "list_resources")
 
+    def iter_resources(self, page_size: int = 200) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily yield every resource in the KB, fetching one page at a time.
+        Unlike list_resources, request errors propagate as requests exceptions.
+        """
+        url = f"{self.kb_base_url}/resources"
+        page = 0
+        while True:
+            resp = self._search_session.get(url, params={"page": page, "size": page_size}, timeout=REQUEST_TIMEOUT)
+            resp.raise_for_status()
+            data = _json_body(resp)
+            resources = data.get("resources", [])
+            yield from resources
+            if len(resources) < page_size or data.get("pagination", {}).get("last"):
+                return
+            page += 1
+
+    async def alist_resources_all(self, page_size: int = 200, prefetch: int = 3) -> Dict[str, Any]:
+        """
+        Fetch every resource in the KB, requesting `prefetch` pages at a time so their round trips overlap.
+        """
+        async def fetch_page(client: httpx.AsyncClient, page: int) -> Dict[str, Any]:
+            resp = await client.get("/resources", params={"page": page, "size": page_size})
+            resp.raise_for_status()
+            return orjson.loads(resp.content)
+
+        resources = []
+        try:
+            async with self._async_client(self._search_headers) as client:
+                page = 0
+                while True:
+                    pages = await asyncio.gather(*(fetch_page(client, page + i) for i in range(prefetch)))
+                    for data in pages:
+                        page_resources = data.get("resources", [])
+                        resources.extend(page_resources)
+                        if len(page_resources) < page_size or data.get("pagination", {}).get("last"):
+                            return {"success": True, "resources": resources}
+                    page += prefetch
+        except httpx.HTTPError as e:
+            logger.error(f"alist_resources_all failed: {e!r}")
+            return {"success": False, "error": repr(e)}
+
+
+def _bn_price_text(product_container: "etree._Element") -> Optional[str]:
+    """
+    Mirror BeautifulSoup's find(string=_PRICE_TEXT_RE) in the container: take the first matching string,
+    and return it empty when it is a comment or script/style/template content, whose .text is empty
+    in BeautifulSoup, so such text never becomes the price.
+    """
+    for node in _BN_TEXT_XP(product_container):
+        if not isinstance(node, str):  # a comment
+            if _PRICE_TEXT_RE.search(node.text or ""):
+                return ""
+            continue
+        if _PRICE_TEXT_RE.search(node):
+            return "" if _bn_is_hidden(node) else str(node)
+    return None
+
+
+def _bn_is_hidden(node: str) -> bool:
+    """Whether a text node sits in script/style/template content; a tail belongs to its parent's parent."""
+    owner = node.getparent()
+    if node.is_tail:
+        owner = owner.getparent()
+    return _BN_HIDDEN_TEXT_XP(owner)
+
+
+def _bn_visible_text(elem: "etree._Element") -> str:
+    """
+    Join an element's text the way BeautifulSoup's .text does, leaving out comments
+    and script/style/template content.
+    """
+    if not _BN_HAS_HIDDEN_XP(elem):
+        return elem.text_content()
+    return "".join(node for node in _BN_STRINGS_XP(elem) if not _bn_is_hidden(node))
+
+
+def _extract_bn_with_lxml(content: str, product_details: Dict[str, Any]) -> bool:
+    """
+    Fill `product_details` from the productDetail-container with one lxml parse and precompiled XPaths.
+    Returns False when the container is missing; parse errors propagate so the caller can fall back.
+    """
+    tree = lxml_html.fromstring(content)
+    containers = _BN_CONTAINER_XP(tree)
+    if not containers:
+        logger.warning("Could not find productDetail-container")
+        return False
+    product_container = containers[0]
+    logger.debug("✅ Found productDetail-container")
+
+    def first(xpaths: List["etree.XPath"]):
+        for xpath in xpaths:
+            found = xpath(product_container)
+            if found:
+                yield found[0]
 
-def extract_bn_product_details_from_content(content: str, source_url: str = "") -> dict:
-    """Extract Barnes & Noble specific product details from productDetail-container."""
-    
-    logger.debug(f"=== B&N EXTRACTION FUNCTION CALLED ===")
-    logger.debug(f"Content length received: {len(content)}")
-    logger.debug(f"Source URL: {source_url}")
-    
-    product_details = {
-        "name": "Unknown Product",
-        "price": "Price not available",
-        "imageUrl": "https://via.placeholder.com/300x300?text=No+Image",
-        "description": "No description available.",
-        "supplier": "Barnes & Noble",
-        "author": "Unknown Author",
-        "availability": "Unknown",
-        "productUrl": source_url
-    }
-    
+    try:
+        # Extract author: hidden input value first, link text as fallback
+        author_sections = _BN_AUTHOR_SECTION_XP(product_container)
+        if author_sections:
+            logger.debug("✅ Found pdp-header-authors section")
+            author_values = _BN_AUTHOR_INPUT_XP(author_sections[0])
+            author_links = _BN_AUTHOR_LINK_XP(author_sections[0])
+            if author_values and author_values[0]:
+                product_details["author"] = str(author_values[0])
+                logger.debug("✅ Extracted author from input: %s", product_details['author'])
+            elif author_links and (author_text := _bn_visible_text(author_links[0]).strip()):
+                product_details["author"] = author_text
+                logger.debug("✅ Extracted author from link: %s", product_details['author'])
+        else:
+            logger.debug("❌ Could not find pdp-header-authors section")
+
+        # Extract product title
+        for title_elem in first(_BN_TITLE_XPS):
+            if title_text := _bn_visible_text(title_elem).strip():
+                product_details["name"] = title_text
+                logger.debug("✅ Extracted title: %s", product_details['name'])
+                break
+
+        # Extract price, from a price element or else the first bare "$12.34" text node
+        price_texts = [_bn_visible_text(elem).strip() for elem in first(_BN_PRICE_XPS)]
+        price_node = _bn_price_text(product_container)
+        if price_node is not None:
+            price_texts.append(price_node.strip())
+        for price_text in price_texts:
+            if '$' in price_text:
+                product_details["price"] = price_text
+                logger.debug("✅ Extracted price: %s", product_details['price'])
+                break
+
+        # Extract description
+        for desc_elem in first(_BN_DESCRIPTION_XPS):
+            desc_text = _bn_visible_text(desc_elem).strip()
+            if (desc_len := len(desc_text)) > 20:  # Only use if substantial
+                product_details["description"] = desc_text[:500] + "..." if desc_len > 500 else desc_text
+                logger.debug("✅ Extracted description: %s...", product_details['description'][:100])
+                break
+
+        # Extract image
+        for img_elem in first(_BN_IMAGE_XPS):
+            img_url = img_elem.get('src') or img_elem.get('data-src') or img_elem.get('data-lazy-src')
+            if img_url and not img_url.startswith('data:'):
+                # Handle relative URLs
+                if img_url.startswith('//'):
+                    img_url = 'https:' + img_url
+                elif img_url.startswith('/'):
+                    img_url = 'https://www.barnesandnoble.com' + img_url
+
+                product_details["imageUrl"] = img_url
+                logger.debug("✅ Extracted image: %s", img_url)
+                break
+
+        # Extract availability
+        for avail_elem in first(_BN_AVAILABILITY_XPS):
+            if avail_text := _bn_visible_text(avail_elem).strip():
+                product_details["availability"] = avail_text
+                logger.debug("✅ Extracted availability: %s", product_details['availability'])
+                break
+
+    except Exception as e:
+        logger.error(f"❌ Error extracting B&N product details: {e}")
+
+    return True
+
+
+def _extract_bn_with_bs4(content: str, product_details: Dict[str, Any]) -> bool:
+    """
+    Fill `product_details` from the productDetail-container using BeautifulSoup.
+    Returns False when the container is missing (or bs4 is not installed).
+    """
     try:
         from bs4 import BeautifulSoup
         soup = BeautifulSoup(content, 'html.parser')
@@ -305,7 +816,7 @@ def extract_bn_product_details_from_content(content: str, source_url: str = "")
         product_container = soup.find('div', id='productDetail-container')
         if not product_container:
             logger.warning("Could not find productDetail-container")
-            return product_details
+            return False
         
         logger.debug("✅ Found productDetail-container")
         
@@ -318,37 +829,37 @@ def extract_bn_product_details_from_content(content: str, source_url: str = "")
             author_input = author_section.find('input', id='author')
             if author_input and author_input.get('value'):
                 product_details["author"] = author_input['value']
-                logger.debug(f"✅ Extracted author from input: {product_details['author']}")
+                logger.debug("✅ Extracted author from input: %s", product_details['author'])
             
             # Method 2: Extract from the link text as fallback
             elif not product_details["author"] or product_details["author"] == "Unknown Author":
                 author_link = author_section.find('a')
                 if author_link and author_link.text.strip():
                     product_details["author"] = author_link.text.strip()
-                    logger.debug(f"✅ Extracted author from link: {product_details['author']}")
+                    logger.debug("✅ Extracted author from link: %s", product_details['author'])
         else:
             logger.debug("❌ Could not find pdp-header-authors section")
         
         # Extract product title
         title_elements = [
-            product_container.find('h1', class_=lambda x: x and 'title' in x.lower()),
+            product_container.find('h1', class_=_RE_TITLE),
             product_container.find('h1'),
             product_container.find(attrs={'data-testid': 'product-title'}),
-            product_container.find('div', class_=lambda x: x and 'product-title' in x.lower())
+            product_container.find('div', class_=_RE_PRODUCT_TITLE)
         ]
         
         for title_elem in title_elements:
             if title_elem and title_elem.text.strip():
                 product_details["name"] = title_elem.text.strip()
-                logger.debug(f"✅ Extracted title: {product_details['name']}")
+                logger.debug("✅ Extracted title: %s", product_details['name'])
                 break
         
         # Extract price
         price_elements = [
             product_container.find(attrs={'data-testid': 'price'}),
-            product_container.find('span', class_=lambda x: x and 'price' in x.lower()),
-            product_container.find('div', class_=lambda x: x and 'price' in x.lower()),
-            product_container.find(string=re.compile(r'\$\d+\.\d+'))
+            product_container.find('span', class_=_RE_PRICE),
+            product_container.find('div', class_=_RE_PRICE),
+            product_container.find(string=_PRICE_TEXT_RE)
         ]
         
         for price_elem in price_elements:
@@ -356,31 +867,32 @@ def extract_bn_product_details_from_content(content: str, source_url: str = "")
                 price_text = price_elem.text.strip() if hasattr(price_elem, 'text') else str(price_elem).strip()
                 if '$' in price_text:
                     product_details["price"] = price_text
-                    logger.debug(f"✅ Extracted price: {product_details['price']}")
+                    logger.debug("✅ Extracted price: %s", product_details['price'])
                     break
         
         # Extract description
         description_elements = [
-            product_container.find('div', class_=lambda x: x and 'overview' in x.lower()),
-            product_container.find('div', class_=lambda x: x and 'description' in x.lower()),
-            product_container.find('div', class_=lambda x: x and 'summary' in x.lower()),
+            product_container.find('div', class_=_RE_OVERVIEW),
+            product_container.find('div', class_=_RE_DESCRIPTION),
+            product_container.find('div', class_=_RE_SUMMARY),
             product_container.find(attrs={'data-testid': 'description'})
         ]
         
         for desc_elem in description_elements:
             if desc_elem and desc_elem.text.strip():
                 desc_text = desc_elem.text.strip()
-                if len(desc_text) > 20:  # Only use if substantial
-                    product_details["description"] = desc_text[:500] + "..." if len(desc_text) > 500 else desc_text
-                    logger.debug(f"✅ Extracted description: {product_details['description'][:100]}...")
+                if (desc_len := len(desc_text)) > 20:  # Only use if substantial
+                    product_details["description"] = desc_text[:500] + "..." if desc_len > 500 else desc_text
+                    logger.debug("✅ Extracted description: %s...", product_details['description'][:100])
                     break
         
         # Extract image
+        image_div = product_container.find('div', class_=_RE_IMAGE)
         image_elements = [
             product_container.find('img', id='pdpMainImage'),  # Priority for B&N main product image
-            product_container.find('img', class_=lambda x: x and 'product' in x.lower()),
+            product_container.find('img', class_=_RE_PRODUCT),
             product_container.find('img', attrs={'data-testid': 'product-image'}),
-            product_container.find('div', class_=lambda x: x and 'image' in x.lower()).find('img') if product_container.find('div', class_=lambda x: x and 'image' in x.lower()) else None,
+            image_div.find('img') if image_div is not None else None,
             product_container.find('img')  # Any img as fallback
         ]
         
@@ -395,50 +907,153 @@ def extract_bn_product_details_from_content(content: str, source_url: str = "")
                         img_url = 'https://www.barnesandnoble.com' + img_url
                     
                     product_details["imageUrl"] = img_url
-                    logger.debug(f"✅ Extracted image: {img_url}")
+                    logger.debug("✅ Extracted image: %s", img_url)
                     break
         
         # Extract availability
         availability_elements = [
             product_container.find(attrs={'data-testid': 'availability'}),
-            product_container.find('span', class_=lambda x: x and 'availability' in x.lower()),
-            product_container.find('div', class_=lambda x: x and 'stock' in x.lower())
+            product_container.find('span', class_=_RE_AVAILABILITY),
+            product_container.find('div', class_=_RE_STOCK)
         ]
         
         for avail_elem in availability_elements:
             if avail_elem and avail_elem.text.strip():
                 product_details["availability"] = avail_elem.text.strip()
-                logger.debug(f"✅ Extracted availability: {product_details['availability']}")
+                logger.debug("✅ Extracted availability: %s", product_details['availability'])
                 break
                 
     except ImportError:
         logger.error("❌ BeautifulSoup4 is not installed! Run: pip install beautifulsoup4")
-        return product_details
+        return False
     except Exception as e:
         logger.error(f"❌ Error extracting B&N product details: {e}")
+
+    return True
+
+
+def extract_bn_product_details_from_content(content: str, source_url: str = "") -> dict:
+    """Extract Barnes & Noble specific product details from productDetail-container."""
+    
+    logger.debug("=== B&N EXTRACTION FUNCTION CALLED ===")
+    logger.debug("Content length received: %d", len(content))
+    logger.debug("Source URL: %s", source_url)
     
-    # Fallback regex patterns if BeautifulSoup didn't find everything
+    product_details = {
+        "name": "Unknown Product",
+        "price": "Price not available",
+        "imageUrl": "https://via.placeholder.com/300x300?text=No+Image",
+        "description": "No description available.",
+        "supplier": "Barnes & Noble",
+        "author": "Unknown Author",
+        "availability": "Unknown",
+        "productUrl": source_url
+    }
+    
+    # Pages from other sites carry no container, skip parsing them at all
+    if 'productDetail-container' not in content:
+        logger.warning("Could not find productDetail-container")
+        return product_details
+
+    extracted = None
+    if lxml_html is not None:
+        try:
+            extracted = _extract_bn_with_lxml(content, product_details)
+        except (etree.ParserError, ValueError) as e:
+            logger.debug("lxml could not parse content, falling back to BeautifulSoup: %s", e)
+    if extracted is None:
+        extracted = _extract_bn_with_bs4(content, product_details)
+    if not extracted:
+        return product_details
+
+    # Fallback regex patterns if the DOM pass didn't find everything
     if product_details["author"] == "Unknown Author":
-        author_patterns = [
-            r'<input[^>]*id=["\']author["\'][^>]*value=["\']([^"\']+)["\']',
-            r'by\s*<a[^>]*href=[^>]*>([^<]+)</a>',
-        ]
-        
-        for pattern in author_patterns:
-            match = re.search(pattern, content, re.IGNORECASE)
+        for pattern in _BN_AUTHOR_PATTERNS:
+            match = pattern.search(content)
             if match:
                 product_details["author"] = match.group(1).strip()
-                logger.debug(f"✅ Extracted author via regex: {product_details['author']}")
+                logger.debug("✅ Extracted author via regex: %s", product_details['author'])
                 break
     
-    logger.debug(f"=== FINAL EXTRACTION RESULTS ===")
-    for key, value in product_details.items():
-        logger.debug(f"  {key}: '{str(value)[:100]}'") # Truncate long values for logging
-    logger.debug(f"=== END B&N EXTRACTION ===")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("=== FINAL EXTRACTION RESULTS ===")
+        for key, value in product_details.items():
+            logger.debug("  %s: '%s'", key, str(value)[:100]) # Truncate long values for logging
+        logger.debug("=== END B&N EXTRACTION ===")
     
     return product_details    
 
 
+def _find_json_ld_blocks(content: str) -> List[Union[str, bytes]]:
+    """
+    Return the raw text of the page's JSON-LD blocks.
+    Uses a single lxml DOM pass when available, otherwise falls back to one regex scan.
+    """
+    if lxml_html is not None:
+        try:
+            tree = lxml_html.fromstring(content)
+            # MIME types are case-insensitive; plain str results, orjson doesn't accept lxml's "smart" strings
+            return tree.xpath(
+                '//script[translate(@type, "ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")'
+                '="application/ld+json"]/text()',
+                smart_strings=False
+            )
+        except (etree.ParserError, ValueError) as e:
+            logger.debug("lxml could not parse content, falling back to regex: %s", e)
+
+    return _LDJSON_RE.findall(content.encode(errors="replace"))
+
+
+def _parse_name(raw: str, source_url: str) -> Optional[str]:
+    name = html.unescape(raw.strip())
+    return name if len(name) > 3 else None
+
+
+def _parse_price(raw: str, source_url: str) -> Optional[str]:
+    val = raw.replace(",", "")
+    try:
+        float(val)
+    except ValueError:
+        return None
+    return f"${val}"
+
+
+def _parse_image_url(raw: str, source_url: str) -> Optional[str]:
+    img_url = raw
+    if not img_url:
+        return None
+    if not img_url.startswith("http"):
+        # Attempt to make relative URL absolute using source_url
+        if source_url and (img_url.startswith('/') or img_url.startswith('./')):
+            img_url = urljoin(source_url, img_url)
+        elif source_url and not img_url.startswith('//'): # e.g., just a filename
+            img_url = urljoin(source_url, img_url)
+        elif img_url.startswith('//'):
+            img_url = 'https:' + img_url
+    return img_url
+
+
+def _parse_supplier(raw: str, source_url: str) -> Optional[str]:
+    return raw.strip()
+
+
+def _fill_description(details: Dict[str, Any], content: str) -> Dict[str, Any]:
+    """Fall back to the start of the page as description, copied only when no description was extracted."""
+    if details["description"] is None:
+        details["description"] = content[:200] + "..." if len(content) > 200 else content
+    return details
+
+
+# Regex fallbacks of the generic extractor: (field, patterns in priority order, parser).
+# A parser turns the first capture group into the field value, or returns None to try the next pattern.
+_FIELDS: List[Tuple[str, List["re.Pattern"], Callable[[str, str], Optional[str]]]] = [
+    ("name", _NAME_PATTERNS, _parse_name),
+    ("price", _PRICE_PATTERNS, _parse_price),
+    ("imageUrl", _IMG_PATTERNS, _parse_image_url),
+    ("supplier", _SUPPLIER_PATTERNS, _parse_supplier),
+]
+
+
 def extract_product_details_from_content(content: str, source_url: str = "") -> Dict[str, Any]:
     """
     Enhanced extraction that first tries JSON-LD, then falls back to regex patterns.
@@ -455,134 +1070,64 @@ def extract_product_details_from_content(content: str, source_url: str = "") ->
         "price": "Price not available",
         "currency": "USD",
         "imageUrl": "https://via.placeholder.com/300x300?text=No+Image",
-        "description": content[:200] + "..." if len(content) > 200 else content,
+        "description": None,  # filled from the page start only if nothing better is found
         "supplier": "Unknown Supplier",
         "productUrl": source_url,
         "availability": "Unknown"
     }
 
-    # First, try to extract from JSON-LD structured data
-    json_ld_patterns = [
-        r'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
-        r'"@type"\s*:\s*"Product"[^}]*}',
-    ]
-    
-    for pattern in json_ld_patterns:
-        matches = re.findall(pattern, content, re.IGNORECASE | re.DOTALL)
-        for match in matches:
-            try:
-                json_data = json.loads(match.strip())
-                if isinstance(json_data, dict) and json_data.get("@type") == "Product":
-                    # Extract from JSON-LD
-                    if "name" in json_data:
-                        details["name"] = json_data["name"]
-                    if "offers" in json_data and isinstance(json_data["offers"], dict):
-                        price = json_data["offers"].get("price")
-                        if price:
-                            details["price"] = f"${price}"
-                    if "image" in json_data:
-                        img = json_data["image"]
-                        if isinstance(img, list) and img:
-                            details["imageUrl"] = img[0]
-                        elif isinstance(img, str):
-                            details["imageUrl"] = img
-                    if "description" in json_data:
-                        details["description"] = json_data["description"][:300]
-                    if "brand" in json_data:
-                        brand = json_data["brand"]
-                        if isinstance(brand, dict) and "name" in brand:
-                            details["supplier"] = brand["name"]
-                        elif isinstance(brand, str):
-                            details["supplier"] = brand
-                    return details  # Return early if JSON-LD was successful
-            except (json.JSONDecodeError, KeyError):
-                continue
-
-    # Fallback to regex patterns if JSON-LD extraction failed
-    name_patterns = [
-        r'<title[^>]*>([^<|]+?)(?:\s*[\|\-].*?)?</title>',
-        r'"name"\s*:\s*"([^"]+)"',
-        r'<meta[^>]+property="og:title"[^>]+content="([^"]+)"',
-        r'<h1[^>]*>([^<]+)</h1>',
-    ]
-    price_patterns = [
-        r'"price"\s*:\s*"([0-9,]+\.?[0-9]*)"',
-        r'[\$£€¥₹]\s*([0-9,]+\.?[0-9]*)',
-        r'<span[^>]*class="[^"]*price[^"]*"[^>]*>[\$£€¥₹]?\s*([0-9,]+\.?[0-9]*)',
-    ]
-    img_patterns = [
-        r'"image"\s*:\s*"([^"]+\.(?:jpg|jpeg|png|webp))"',
-        r'<meta[^>]+property="og:image"[^>]+content="([^"]+)"',
-        r'<img[^>]+(?:data-lazy-)?src=["\']([^"\']+\.(?:jpg|jpeg|png|webp))["\']',
-        r'data-src=["\']([^"\']+\.(?:jpg|jpeg|png|webp))["\']',
-    ]
-    supplier_patterns = [
-        r'"brand"\s*:\s*\{\s*"name"\s*:\s*"([^"]+)"',
-        r'<meta[^>]+name="brand"[^>]+content="([^"]+)"',
-        r'brand["\s]*:?["\s]*([^"\n,]+)',
-    ]
-    availability_patterns = [
-        r'(in\s+stock|out\s+of\s+stock|available|pre-?order|back\s*order)',
-    ]
-
-    # extract name
-    for p in name_patterns:
-        m = re.search(p, content, re.IGNORECASE | re.DOTALL)
-        if m:
-            n = html.unescape(m.group(1).strip())
-            if len(n) > 3:
-                details["name"] = n
-                break
+    # First, try to extract from JSON-LD structured data (a cheap regex test skips pages without any)
+    for match in _find_json_ld_blocks(content) if _LDJSON_HINT_RE.search(content) else ():
+        try:
+            json_data = orjson.loads(match)
+            if isinstance(json_data, dict) and json_data.get("@type") == "Product":
+                # Extract from JSON-LD
+                if "name" in json_data:
+                    details["name"] = json_data["name"]
+                if "offers" in json_data and isinstance(json_data["offers"], dict):
+                    price = json_data["offers"].get("price")
+                    if price:
+                        details["price"] = f"${price}"
+                if "image" in json_data:
+                    img = json_data["image"]
+                    if isinstance(img, list) and img:
+                        details["imageUrl"] = img[0]
+                    elif isinstance(img, str):
+                        details["imageUrl"] = img
+                if "description" in json_data:
+                    details["description"] = json_data["description"][:300]
+                if "brand" in json_data:
+                    brand = json_data["brand"]
+                    if isinstance(brand, dict) and "name" in brand:
+                        details["supplier"] = brand["name"]
+                    elif isinstance(brand, str):
+                        details["supplier"] = brand
+                return _fill_description(details, content)  # Return early if JSON-LD was successful
+        except (orjson.JSONDecodeError, KeyError):
+            continue
 
-    # extract price
-    for p in price_patterns:
-        m = re.search(p, content, re.IGNORECASE)
-        if m:
-            val = m.group(1).replace(",", "")
-            try:
-                float(val)
-                details["price"] = f"${val}"
-                break
-            except ValueError:
+    # Fallback to regex patterns if JSON-LD extraction failed; with Hyperscan installed only
+    # the patterns that occur in the page are run
+    hits = _matching_patterns(content)
+    # A page without any currency symbol can't match the symbol-anchored price pattern
+    has_currency_symbol = hits is not None or any(symbol in content for symbol in _CURRENCY_SYMBOLS)
+    for field, patterns, parse in _FIELDS:
+        for p in patterns:
+            if hits is not None and p not in hits:
                 continue
-
-    # extract image
-    for p in img_patterns:
-        m = re.search(p, content, re.IGNORECASE)
-        if m:
-            img_url = m.group(1)
-            if img_url:
-                if not img_url.startswith("http"):
-                    # Attempt to make relative URL absolute using source_url
-                    if source_url and (img_url.startswith('/') or img_url.startswith('./')):
-                        from urllib.parse import urljoin
-                        img_url = urljoin(source_url, img_url)
-                    elif source_url and not img_url.startswith('//'): # e.g., just a filename
-                        from urllib.parse import urljoin
-                        img_url = urljoin(source_url, img_url)
-                    elif img_url.startswith('//'):
-                        img_url = 'https:' + img_url
-                details["imageUrl"] = img_url
-                break
-
-    # extract supplier
-    for p in supplier_patterns:
-        m = re.search(p, content, re.IGNORECASE)
-        if m:
-            details["supplier"] = m.group(1).strip()
-            break
+            if p is _CURRENCY_PRICE_RE and not has_currency_symbol:
+                continue
+            m = p.search(content)
+            if m:
+                value = parse(m.group(1), source_url)
+                if value is not None:
+                    details[field] = value
+                    break
 
     # extract availability
-    for p in availability_patterns:
-        m = re.search(p, content, re.IGNORECASE)
+    if hits is None or _AVAIL_RE in hits:
+        m = _AVAIL_RE.search(content)
         if m:
-            text = m.group(1).lower()
-            if "in stock" in text:
-                details["availability"] = "In Stock"
-            elif "out of stock" in text:
-                details["availability"] = "Out of Stock"
-            else:
-                details["availability"] = text.title()
-            break
+            details["availability"] = _AVAIL_LABELS[m.lastgroup]
 
-    return details
\ No newline at end of file
+    return _fill_description(details, content)
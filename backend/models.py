@@ -0,0 +1,61 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+
+@dataclass
+class ProductRow:
+    """
+    A row of the Supabase `products` table, built from Nuclia's extracted metadata.
+    """
+
+    __slots__ = (
+        "nuclia_document_id", "name", "price_text", "image_url", "description", "supplier",
+        "availability", "product_url", "last_updated", "product_type", "has_metadata",
+    )
+
+    nuclia_document_id: str
+    name: str
+    price_text: str
+    image_url: str
+    description: str
+    supplier: str
+    availability: str
+    product_url: str
+    last_updated: str
+    product_type: str
+    has_metadata: bool
+
+    @classmethod
+    def from_extracted(cls,
+                       document_id: str,
+                       extracted: Dict[str, Any],
+                       url: str,
+                       is_product_page: bool = False) -> "ProductRow":
+        """
+        Build a row from flattened Nuclia usermetadata, filling defaults for missing fields.
+        """
+        name = extracted.get("name", "Unknown Product")
+        price_text = extracted.get("price", "Price not available")
+        image_url = extracted.get("imageUrl", "")
+        return cls(
+            nuclia_document_id=document_id,
+            name=name,
+            price_text=price_text,
+            image_url=image_url,
+            description=extracted.get("description", ""),
+            supplier=extracted.get("supplier", "Unknown Supplier"),
+            availability=extracted.get("availability", "Unknown"),
+            product_url=url,
+            last_updated=datetime.now(timezone.utc).isoformat(),
+            product_type="product" if is_product_page else "generic",
+            has_metadata=bool(
+                (name and name != "Unknown Product") or
+                (price_text and price_text != "Price not available") or
+                image_url
+            )
+        )
+
+    def to_upsert(self) -> Dict[str, Any]:
+        """Return the row as a dict ready for a Supabase upsert."""
+        return {field: getattr(self, field) for field in self.__slots__}
@@ -0,0 +1,8 @@
+"""
+API blueprints registered by the app factory in app.py.
+"""
+
+from routes.core import core_bp
+from routes.products import products_bp
+
+__all__ = ["core_bp", "products_bp"]
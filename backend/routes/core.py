@@ -0,0 +1,30 @@
+"""
+Service-level endpoints: health check and chat widget configuration.
+"""
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from indexing import _utc_now_iso
+
+core_bp = Blueprint("core", __name__)
+
+
+@core_bp.route('/', methods=['GET'])
+def health_check():
+    """Health check endpoint."""
+    return jsonify({
+        "status": "healthy",
+        "service": "Nuclia RAG E-commerce Backend",
+        "timestamp": _utc_now_iso()
+    })
+
+@core_bp.route('/nuclia-config', methods=['GET'])
+def get_nuclia_config():
+    """Provide Nuclia configuration for the chat widget."""
+    response = Response(
+        current_app.extensions["nuclia_config_json"],
+        mimetype='application/json',
+        headers={'Cache-Control': 'private, max-age=60'}
+    )
+    response.set_etag(current_app.extensions["nuclia_config_etag"])
+    return response.make_conditional(request)
@@ -0,0 +1,194 @@
+"""
+Product endpoints: indexing URLs into Nuclia, listing resources and comparing stored products.
+"""
+
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+from flask import Blueprint, current_app, request, jsonify
+
+from models import ProductRow
+
+logger = logging.getLogger(__name__)
+
+products_bp = Blueprint("products", __name__)
+
+# Key attributes aligned side by side by /compare-products
+COMPARE_ATTRIBUTES = [
+    "name", "price_text", "supplier", "availability",
+    "description", "product_url", "image_url"
+]
+# Only fetch the columns /compare-products returns instead of select("*")
+COMPARE_COLUMNS = ",".join(["id", "nuclia_document_id", *COMPARE_ATTRIBUTES, "product_type", "has_metadata", "last_updated"])
+
+# Nuclia resource ids are short url-safe tokens; anything else is rejected before it reaches PostgREST
+_NUCLIA_DOC_ID_RE = re.compile(r'[A-Za-z0-9_-]{1,64}')
+
+# Lets the two /compare-products lookups run side by side
+_lookup_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="supabase-lookup")
+
+
+def _select_products(supabase: Any, column: str, values: List[Any]) -> List[Dict[str, Any]]:
+    """Fetch the compared columns for products whose `column` is in `values`."""
+    result = supabase.table("products").select(COMPARE_COLUMNS).in_(column, values).execute()
+    return result.data or []
+
+
+@products_bp.route('/index-url', methods=['POST'])
+def index_url():
+    """
+    Indexes a URL using Nuclia, retrieves the extracted metadata,
+    and stores the product data in Supabase.
+    """
+    indexer = current_app.extensions["indexer"]
+    supabase_writer = current_app.extensions["supabase_writer"]
+
+    data = request.get_json()
+    url = data.get('url')
+    is_product_page = data.get('is_product_page', False)
+    if not url:
+        return jsonify({"success": False, "error": "URL is required"}), 400
+
+    try:
+        # Step 1: Let Nuclia ingest the URL
+        result = indexer.upload_from_url(url=url, title=f"Product from {url}")
+
+        if not result.get("success"):
+            return jsonify(result), 500
+
+        document_id = result.get("document_id")
+        if not document_id:
+            return jsonify({"success": False, "error": "Failed to get document_id from Nuclia"}), 500
+
+        # Step 2: Retrieve the resource from Nuclia to get extracted metadata
+        resource_result = indexer.get_resource_by_id(document_id)
+
+        if resource_result.get("success"):
+            resource_data = resource_result.get("resource", {})
+            usermetadata = resource_data.get("usermetadata", {})
+
+            # Flatten the Nuclia usermetadata structure
+            extracted_details = indexer._flatten_nuclia_usermetadata(usermetadata)
+            logger.info(f"Retrieved metadata from Nuclia for document {document_id}")
+            logger.debug(f"Extracted details: {extracted_details}")
+        else:
+            extracted_details = {}
+            logger.warning(f"Failed to retrieve resource {document_id} from Nuclia: {resource_result.get('error')}")
+
+        # Step 3: Queue the product data for a batched Supabase upsert. A queued row is written in the
+        # background, so the response can only report that it was accepted; when the queue is full the
+        # writer upserts inline instead and the row is known to have landed.
+        if supabase_writer:
+            product_data = ProductRow.from_extracted(document_id, extracted_details, url, is_product_page).to_upsert()
+            result["supabase_queued"] = supabase_writer.submit(product_data)
+            if result["supabase_queued"]:
+                logger.info(f"Queued product data for Supabase upsert for doc {document_id}")
+            else:
+                logger.info(f"Upserted product data to Supabase for doc {document_id}")
+                result["supabase_success"] = True
+        else:
+            result["supabase_queued"] = False
+            result["supabase_success"] = False
+
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"Error in index_url endpoint: {e}", exc_info=True)
+        return jsonify({"success": False, "error": f"Internal server error: {e}"}), 500
+
+@products_bp.route('/list-products', methods=['GET'])
+def list_products():
+    """Lists all indexed resources from Nuclia."""
+    limit = request.args.get('limit', 100, type=int)
+    # The indexer caches listings briefly and drops them on every write it makes
+    return jsonify(current_app.extensions["indexer"].list_resources(limit=limit))
+
+@products_bp.route('/compare-products', methods=['POST'])
+def compare_products():
+    """
+    Compare multiple products stored in Supabase, either by Supabase `id` or Nuclia `nuclia_document_id`.
+
+    Expected JSON payload (must include at least one of the keys):
+    {
+        "product_ids": [1, 2, 3],   // Supabase integer IDs
+        "nuclia_document_ids": ["doc-abc123", "doc-def456"]  // Nuclia resource IDs
+    }
+
+    Returns a comparison-friendly JSON where products are aligned by key attributes.
+    """
+    supabase = current_app.extensions["supabase"]
+    try:
+        if not supabase:
+            return jsonify({
+                "success": False,
+                "error": "Supabase not configured"
+            }), 500
+
+        data = request.get_json()
+        if not data or ("product_ids" not in data and "nuclia_document_ids" not in data):
+            return jsonify({
+                "success": False,
+                "error": "Missing 'product_ids' or 'nuclia_document_ids' in request body"
+            }), 400
+
+        product_ids = data.get("product_ids") or []
+        nuclia_doc_ids = data.get("nuclia_document_ids") or []
+
+        if not (product_ids or nuclia_doc_ids):
+            return jsonify({
+                "success": False,
+                "error": "Both 'product_ids' and 'nuclia_document_ids' are empty"
+            }), 400
+
+        if not isinstance(product_ids, list) or any(
+            isinstance(pid, bool) or not isinstance(pid, int) for pid in product_ids
+        ):
+            return jsonify({
+                "success": False,
+                "error": "'product_ids' must be a list of integers"
+            }), 400
+
+        if not isinstance(nuclia_doc_ids, list) or any(
+            not isinstance(doc_id, str) or not _NUCLIA_DOC_ID_RE.fullmatch(doc_id) for doc_id in nuclia_doc_ids
+        ):
+            return jsonify({
+                "success": False,
+                "error": "'nuclia_document_ids' must be a list of Nuclia resource IDs"
+            }), 400
+
+        # Query Supabase with one IN filter per key, running both lookups concurrently when needed
+        id_lookup = _lookup_pool.submit(_select_products, supabase, "id", product_ids) if product_ids else None
+        rows = _select_products(supabase, "nuclia_document_id", nuclia_doc_ids) if nuclia_doc_ids else []
+        if id_lookup is not None:
+            rows = id_lookup.result() + rows
+
+        # A product can match both lists, keep it once
+        products = list({product["id"]: product for product in rows}.values())
+
+        if not products:
+            return jsonify({
+                "success": False,
+                "error": "No matching products found",
+                "products": []
+            }), 404
+
+        # Build comparison matrix, one column per attribute in product order
+        comparison_attributes = {
+            attr: [product.get(attr, "N/A") for product in products]
+            for attr in COMPARE_ATTRIBUTES
+        }
+
+        return jsonify({
+            "success": True,
+            "products": products,
+            "comparison_attributes": comparison_attributes,
+            "total": len(products)
+        })
+
+    except Exception as e:
+        logger.error(f"Error in compare_products endpoint: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": f"Internal server error: {str(e)}"
+        }), 500
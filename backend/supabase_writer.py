@@ -0,0 +1,105 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class SupabaseWriter:
+    """
+    Batches Supabase upserts on a background thread so request handlers
+    don't wait on a PostgREST round-trip per row.
+    """
+
+    def __init__(self,
+                 client: Any,
+                 table: str = "products",
+                 on_conflict: str = "nuclia_document_id",
+                 batch_size: int = 50,
+                 flush_interval: float = 0.2,
+                 maxsize: int = 1000,
+                 retries: int = 1,
+                 retry_delay: float = 1.0):
+        self.client = client
+        self.table = table
+        self.on_conflict = on_conflict
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, name="supabase-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, row: Dict[str, Any]) -> bool:
+        """
+        Queue a row for upsert. Returns True if queued; when the queue is full
+        the row is upserted synchronously instead and False is returned.
+        """
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            logger.warning("Supabase write queue is full, upserting synchronously")
+            self._upsert([row])
+            return False
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush pending rows and stop the writer thread."""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.error("Supabase write queue did not drain before shutdown")
+            return
+        self._thread.join(timeout)
+
+    def _upsert(self, rows: List[Dict[str, Any]]) -> None:
+        # PostgREST rejects a batch that touches the same conflict key twice, keep the latest row
+        unique_rows = list({row[self.on_conflict]: row for row in rows}.values())
+        self.client.table(self.table).upsert(unique_rows, on_conflict=self.on_conflict).execute()
+        logger.info(f"Upserted {len(unique_rows)} row(s) to Supabase table {self.table}")
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            row = self._queue.get()
+            if row is _STOP:
+                break
+
+            batch = [row]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is _STOP:
+                    stop = True
+                    break
+                batch.append(row)
+
+            self._upsert_with_retry(batch)
+
+    def _upsert_with_retry(self, rows: List[Dict[str, Any]]) -> None:
+        """Upsert a background batch, retrying transient failures before the rows are dropped."""
+        for attempt in range(self.retries + 1):
+            try:
+                self._upsert(rows)
+                return
+            except Exception as e:
+                if attempt < self.retries:
+                    logger.warning(f"Supabase upsert of {len(rows)} row(s) failed, retrying: {e}")
+                    time.sleep(self.retry_delay * (attempt + 1))
+                else:
+                    logger.error(f"Dropping {len(rows)} row(s) after failed Supabase upsert: {e}", exc_info=True)
@@ -0,0 +1,153 @@
+"""
+The lxml B&N extractor must agree with the BeautifulSoup walk it replaced, which is kept as its fallback.
+"""
+
+import random
+
+import pytest
+
+import indexing
+
+pytest.importorskip("lxml")
+pytest.importorskip("bs4")
+
+# Building blocks of B&N-style product containers, including strings BeautifulSoup never reads as text
+FRAGMENTS = [
+    '<h1 class="pdp-Title x">The Book</h1>',
+    '<h1>Plain H1</h1>',
+    '<span data-testid="product-title">DT title</span>',
+    '<div class="Product-Title">Div title</div>',
+    '<span class="price-now">$12.99</span>',
+    '<div class="PriceBox">No dollar</div>',
+    '<p>Only $4.50 here</p>',
+    '<p>a<b>b</b>Tail $8.80</p>',
+    '<script>window.cfg={minOrder:"$25.00"};</script>',
+    '<style>.badge:after{content:"$1.00"}</style>',
+    '<!-- was $30.00 -->',
+    '<div class="overview">short</div>',
+    '<div class="Overview-text">' + 'long text ' * 60 + '</div>',
+    '<p data-testid="description">' + 'desc desc ' * 5 + '</p>',
+    '<img id="pdpMainImage" src="/main.jpg">',
+    '<img class="productImg" data-src="//cdn/a.png">',
+    '<img data-testid="product-image" src="data:xx">',
+    '<div class="imageWrap"><p><img src="http://x/in-div.jpg"></p></div>',
+    '<span data-testid="availability"> In Stock </span>',
+    '<div class="stock">Out</div>',
+    '<div id="pdp-header-authors">by <a href="/a">Jane Roe</a><input id="author" value=""></div>',
+    '<div id="pdp-header-authors"><input id="author" value="John Doe"><a>Link</a></div>',
+    # Hidden content inside the field elements themselves
+    '<h1 class="title"><script>var t=1;</script>Name<!-- c --></h1>',
+    '<span data-testid="price"><script>x="$9.99"</script>$5.00</span>',
+    '<span class="price"><style>.p{}</style><b>$7.<template>00</template></b>25</span>',
+    '<div class="overview"><style>.o{color:red}</style>' + 'overview text ' * 3 + '</div>',
+    '<div data-testid="availability"><template>Sold out</template>Ships soon</div>',
+    '<span class="availability"><script>s=1</script></span>',
+    '<div id="pdp-header-authors"><a><script>a=1</script>Ann <i>Smith</i></a></div>',
+]
+
+
+def _page(rng: random.Random) -> str:
+    inner = "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 8)))
+    return f'<html><body><div id="productDetail-container">{inner}</div></body></html>'
+
+
+URL = "https://www.barnesandnoble.com/w/x"
+
+
+def _extract_with_bs4(monkeypatch, content):
+    with monkeypatch.context() as m:
+        m.setattr(indexing, "lxml_html", None)
+        return indexing.extract_bn_product_details_from_content(content, URL)
+
+
+def test_lxml_matches_beautifulsoup_on_random_pages(monkeypatch):
+    rng = random.Random(3)
+    for _ in range(3000):
+        content = _page(rng)
+        lxml_details = indexing.extract_bn_product_details_from_content(content, URL)
+        assert lxml_details == _extract_with_bs4(monkeypatch, content), content
+
+
+@pytest.mark.parametrize("hidden", [
+    '<script>window.cfg={minOrder:"$25.00"};</script>',
+    '<style>.badge:after{content:"$25.00"}</style>',
+    '<!-- was $25.00 -->',
+])
+def test_price_never_comes_from_script_style_or_comments(monkeypatch, hidden):
+    content = f'<div id="productDetail-container">{hidden}<p>Now $12.99</p></div>'
+    details = indexing.extract_bn_product_details_from_content(content, URL)
+    assert "25.00" not in details["price"]
+    assert details == _extract_with_bs4(monkeypatch, content)
+
+
+@pytest.mark.parametrize("fragment, field, expected", [
+    ('<span data-testid="price"><script>x="$9.99"</script>$5.00</span>', "price", "$5.00"),
+    ('<h1 class="title"><script>var t=1;</script>Name</h1>', "name", "Name"),
+    ('<div class="overview"><style>.o{color:red}</style>' + 'overview ' * 4 + '</div>', "description",
+     ('overview ' * 4).strip()),
+    ('<div data-testid="availability"><template>Sold out</template>In Stock</div>', "availability", "In Stock"),
+    ('<div id="pdp-header-authors"><a><script>a=1</script>Ann Smith</a></div>', "author", "Ann Smith"),
+])
+def test_fields_skip_script_style_and_template_text(monkeypatch, fragment, field, expected):
+    content = f'<div id="productDetail-container">{fragment}</div>'
+    details = indexing.extract_bn_product_details_from_content(content, URL)
+    assert details[field] == expected
+    assert details == _extract_with_bs4(monkeypatch, content)
+
+
+def test_visible_price_text_is_used():
+    content = '<div id="productDetail-container"><p>a<b>b</b>Now $12.99</p></div>'
+    assert indexing.extract_bn_product_details_from_content(content)["price"] == "Now $12.99"
+
+
+@pytest.mark.parametrize("mime", ["application/ld+json", "application/LD+JSON", "Application/ld+json"])
+def test_json_ld_blocks_match_type_case_insensitively(monkeypatch, mime):
+    content = f'<html><head><script type="{mime}">{{"@type":"Product"}}</script></head></html>'
+    assert indexing._find_json_ld_blocks(content) == ['{"@type":"Product"}']
+    monkeypatch.setattr(indexing, "lxml_html", None)
+    assert indexing._find_json_ld_blocks(content) == [b'{"@type":"Product"}']
+
+
+@pytest.mark.parametrize("mime", ["application/ld+json", "application/LD+JSON", "Application/ld+json"])
+def test_generic_extractor_reads_json_ld_of_any_type_case(mime):
+    content = f'<script type="{mime}">{{"@type":"Product","name":"Widget","offers":{{"price":9.99}}}}</script>'
+    details = indexing.extract_product_details_from_content(content)
+    assert details["name"] == "Widget"
+    assert details["price"] == "$9.99"
+
+
+# Generic-extractor building blocks, including characters Hyperscan folds differently from re
+GENERIC_FRAGMENTS = [
+    '<title>Widget | Shop</title>', '<tİtle>Dotted</tİtle>', '<h1>Big Name</h1>', '<h1 class="x">ıdle</h1>',
+    '"name": "Json Name"', '"price": "19.99"', '$ 5.00', '£12', '€3,50',
+    '<span class="sale-price">$7.25</span>', '<span class="prİce">$8.00</span>',
+    '"image": "http://x/a.png"', '<meta property="og:image" content="//cdn/b.jpg">',
+    '<img data-lazy-src="/c.webp">', "data-src='/d.jpeg'", '"brand": {"name": "Acme"}',
+    '<meta name="brand" content="Brandy">', 'brand: Generic', 'BRAND: ſome',
+    'In Stock', 'İn stock', 'ın stock', 'in\x1cstock', 'in᠎stock', 'out of ſtock', 'Out\x1fof stock',
+    'available', 'Pre-order', 'bacK order', 'backorder', 'plain text ', 'ß', '<p>', '</p>',
+]
+
+
+def _generic_page(rng: random.Random) -> str:
+    return " ".join(rng.choice(GENERIC_FRAGMENTS) for _ in range(rng.randint(0, 10)))
+
+
+def test_hyperscan_prefilter_matches_plain_regex(monkeypatch):
+    if indexing._HS_DB is None:
+        pytest.skip("hyperscan is not installed")
+    rng = random.Random(6)
+    for _ in range(3000):
+        content = _generic_page(rng)
+        prefiltered = indexing.extract_product_details_from_content(content, URL)
+        with monkeypatch.context() as m:
+            m.setattr(indexing, "_HS_DB", None)
+            assert prefiltered == indexing.extract_product_details_from_content(content, URL), repr(content)
+
+
+@pytest.mark.parametrize("content", ["İn stock", "ın stock", "in\x1cstock", "in ſtock", "bacK order"])
+def test_case_folded_availability_with_and_without_hyperscan(monkeypatch, content):
+    expected = "Backorder" if "order" in content else "In Stock"
+    assert indexing.extract_product_details_from_content(content)["availability"] == expected
+    monkeypatch.setattr(indexing, "_HS_DB", None)
+    assert indexing.extract_product_details_from_content(content)["availability"] == expected
@@ -0,0 +1,52 @@
+import orjson
+
+from indexing import NucliaIndexer
+
+
+class _Response:
+    def __init__(self, payload):
+        self.content = orjson.dumps(payload)
+        self.text = self.content.decode()
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return orjson.loads(self.content)
+
+
+class _CountingSession:
+    def __init__(self, payload):
+        self.payload = payload
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        return _Response(self.payload)
+
+
+def _indexer(payload):
+    indexer = NucliaIndexer("edit", "search", "kb")
+    indexer._search_session = _CountingSession(payload)
+    return indexer
+
+
+def test_cached_listing_is_not_shared_with_callers():
+    indexer = _indexer({"resources": [{"id": "a"}]})
+    indexer.list_resources(limit=5)["resources"].append({"id": "mutated"})
+    assert indexer.list_resources(limit=5)["resources"] == [{"id": "a"}]
+    assert indexer._search_session.calls == 1
+
+
+def test_cached_resource_is_not_shared_with_callers():
+    indexer = _indexer({"id": "a", "title": "Widget"})
+    indexer.get_resource_by_id("a")["resource"]["title"] = "mutated"
+    assert indexer.get_resource_by_id("a")["resource"]["title"] == "Widget"
+
+
+def test_invalidate_drops_listings():
+    indexer = _indexer({"resources": []})
+    indexer.list_resources(limit=5)
+    indexer.invalidate("a")
+    indexer.list_resources(limit=5)
+    assert indexer._search_session.calls == 2
@@ -0,0 +1,46 @@
+from supabase_writer import SupabaseWriter
+
+
+class _FlakyTable:
+    def __init__(self, client):
+        self.client = client
+
+    def upsert(self, rows, on_conflict=None):
+        self.rows = rows
+        return self
+
+    def execute(self):
+        self.client.calls += 1
+        if self.client.calls <= self.client.failures:
+            raise RuntimeError("transient")
+        self.client.written.extend(self.rows)
+
+
+class _FlakyClient:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+        self.written = []
+
+    def table(self, name):
+        return _FlakyTable(self)
+
+
+def _writer(client):
+    writer = SupabaseWriter(client, retry_delay=0)
+    writer.close()
+    return writer
+
+
+def test_failed_batch_is_retried_before_dropping():
+    client = _FlakyClient(failures=1)
+    _writer(client)._upsert_with_retry([{"nuclia_document_id": "a"}])
+    assert client.calls == 2
+    assert client.written == [{"nuclia_document_id": "a"}]
+
+
+def test_batch_is_dropped_after_retries_run_out():
+    client = _FlakyClient(failures=5)
+    _writer(client)._upsert_with_retry([{"nuclia_document_id": "a"}])
+    assert client.calls == 2
+    assert client.written == []